@@ -4,6 +4,8 @@
 # dependencies = [
 #   "claude-agent-sdk",
 #   "atproto",
+#   "ciso8601",
+#   "httpx[http2]",
 # ]
 # ///
 """
@@ -22,88 +24,146 @@ import asyncio
 import os
 import sys
 from datetime import datetime, timezone
+from typing import NoReturn
 
-try:
-    from claude_agent_sdk import query, ClaudeAgentOptions
-    from atproto import Client
-except ImportError as e:
+
+def exit_missing_package(e: ImportError) -> NoReturn:
+    """Report a missing dependency and exit."""
     print(f"ERROR: Required package not installed: {e}", file=sys.stderr)
     print("Run with: uv run research.py", file=sys.stderr)
     sys.exit(1)
 
 
-def check_labeler_connectivity(client, labeler_did: str, user_did: str) -> str:
+try:
+    import httpx
+    from ciso8601 import parse_datetime
+except ImportError as e:
+    exit_missing_package(e)
+
+
+# Connection pool for the atproto client, shared by every request including the
+# concurrent connectivity probes (keep-alive amortizes TLS handshakes)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+# Labelers probed per request. The AppView only honours a limited number of
+# atproto-accept-labelers entries per request, so stay under its cap.
+LABELER_BATCH_SIZE = 20
+
+
+def batched(items: list, size: int) -> list[list]:
+    """Split items into consecutive chunks of at most size elements."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def check_labelers_connectivity(client, labeler_dids: list[str], params) -> dict[str, str]:
     """
-    Check if a labeler is reachable by the AppView.
+    Check if a batch of labelers is reachable by the AppView.
 
-    Makes a getProfile request with the labeler in the accept header.
-    If the response includes atproto-content-labelers header with this labeler,
-    it means the AppView successfully connected to it.
+    Makes a single getProfiles request with all labelers in the accept header.
+    The response's atproto-content-labelers header lists every labeler the
+    AppView successfully connected to.
 
-    Returns: 'connected', 'not_connected', or 'error'
+    Returns: mapping of DID to 'connected', 'not_connected', or 'error'
     """
     try:
-        # Make request with this specific labeler in the header
-        url = client._build_url('app.bsky.actor.getProfile')
-        params = {'actor': user_did}
-
-        # Add the labeler to the accept header
+        # Add every labeler in the batch to the accept header
         headers = {
-            'atproto-accept-labelers': labeler_did
+            'atproto-accept-labelers': ','.join(labeler_dids)
         }
 
-        response = client.request.get(url, params=params, headers=headers)
+        response = await client.invoke_query('app.bsky.actor.getProfiles', params=params, headers=headers)
 
-        # Check if the response headers include this labeler in content-labelers
-        response_headers = response.headers
-        content_labelers = response_headers.get('atproto-content-labelers', '')
+        # Check which labelers the response headers include in content-labelers.
+        # Entries are comma-separated DIDs, optionally followed by ;params
+        content_labelers = response.headers.get('atproto-content-labelers', '')
+        returned = frozenset(
+            entry.split(';', 1)[0].strip() for entry in content_labelers.split(',')
+        )
 
         # The AppView includes labelers it successfully connected to
-        if labeler_did in content_labelers:
-            return 'connected'
-        else:
-            return 'not_connected'
+        return {
+            did: 'connected' if did in returned else 'not_connected'
+            for did in labeler_dids
+        }
 
     except Exception as e:
-        print(f"Error checking connectivity for {labeler_did}: {e}", file=sys.stderr)
-        return 'error'
+        print(f"Error checking connectivity for {', '.join(labeler_dids)}: {e}", file=sys.stderr)
+        return {did: 'error' for did in labeler_dids}
 
 
-def time_ago(dt) -> str:
+async def fetch_labeler_details(client, labeler_dids: list[str]) -> dict:
+    """
+    Fetch labeler details from the AppView.
+
+    Returns: mapping of DID to labeler details
+    """
+    labelers_response = await client.app.bsky.labeler.get_services(params={'dids': labeler_dids})
+    labelers = {
+        view.creator.did: {
+            'name': view.creator.display_name or view.creator.handle,
+            'handle': view.creator.handle,
+            'indexed_at': getattr(view, 'indexed_at', None),
+        }
+        for view in labelers_response.views
+    }
+    return labelers
+
+
+async def probe_labelers(client, labeler_dids: list[str], params) -> dict[str, str]:
+    """
+    Probe all labelers concurrently over the client's pooled connection.
+
+    All batches share the same getProfiles params (the logged-in user's profile).
+
+    Returns: mapping of DID to 'connected', 'not_connected', or 'error'
+    """
+    batches = batched(labeler_dids, LABELER_BATCH_SIZE)
+    tasks = [
+        check_labelers_connectivity(client, batch, params)
+        for batch in batches
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    connectivity_by_did = {}
+    for batch, result in zip(batches, results):
+        if isinstance(result, BaseException):
+            print(f"Error checking connectivity for {', '.join(batch)}: {result}", file=sys.stderr)
+            result = {did: 'error' for did in batch}
+        connectivity_by_did.update(result)
+    return connectivity_by_did
+
+
+# (upper bound in seconds, unit, seconds per unit) for time_ago, checked in order
+TIME_AGO_THRESHOLDS = [
+    (60, 'second', 1),
+    (3600, 'minute', 60),
+    (86400, 'hour', 3600),
+    (604800, 'day', 86400),
+    (2592000, 'week', 604800),  # 30 days
+    (31536000, 'month', 2592000),  # 365 days
+    (float('inf'), 'year', 31536000),
+]
+
+
+def time_ago(dt, now=None) -> str:
     """Convert datetime to human-readable time ago string."""
-    now = datetime.now(timezone.utc)
-    diff = now - dt
-
-    seconds = diff.total_seconds()
-
-    if seconds < 60:
-        return f"{int(seconds)} seconds ago"
-    elif seconds < 3600:
-        minutes = int(seconds / 60)
-        return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
-    elif seconds < 86400:
-        hours = int(seconds / 3600)
-        return f"{hours} hour{'s' if hours != 1 else ''} ago"
-    elif seconds < 604800:
-        days = int(seconds / 86400)
-        return f"{days} day{'s' if days != 1 else ''} ago"
-    elif seconds < 2592000:  # 30 days
-        weeks = int(seconds / 604800)
-        return f"{weeks} week{'s' if weeks != 1 else ''} ago"
-    elif seconds < 31536000:  # 365 days
-        months = int(seconds / 2592000)
-        return f"{months} month{'s' if months != 1 else ''} ago"
-    else:
-        years = int(seconds / 31536000)
-        return f"{years} year{'s' if years != 1 else ''} ago"
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    seconds = (now - dt).total_seconds()
+
+    # The last row's limit is infinite, so the loop always stops on a match
+    for limit, unit, unit_seconds in TIME_AGO_THRESHOLDS:
+        if seconds < limit:
+            break
+
+    count = int(seconds / unit_seconds)
+    return f"{count} {unit}{'s' if count != 1 else ''} ago"
 
 
 def parse_iso_datetime(dt_str: str) -> datetime:
     """Parse ISO datetime string to datetime object."""
-    if '.' in dt_str:
-        return datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
-    else:
-        return datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
+    return parse_datetime(dt_str)
 
 
 def get_research_prompt() -> str:
@@ -163,6 +223,8 @@ that warrant review of labeler subscriptions.
 async def main():
     """Execute the labeler monitoring task"""
 
+    now = datetime.now(timezone.utc)
+
     # Check Bluesky authentication
     bluesky_handle = os.getenv('BLUESKY_HANDLE')
     bluesky_password = os.getenv('BLUESKY_APP_PASSWORD')
@@ -185,62 +247,77 @@ async def main():
     print(f"Authentication: Bluesky ({bluesky_handle}) + Claude ({auth_method})")
     print("-" * 70)
 
+    # Heavy SDK imports are deferred until credentials are validated,
+    # so misconfigured runs fail fast without paying their import cost
+    try:
+        from atproto import AsyncClient, AsyncRequest, models
+        from claude_agent_sdk import query, ClaudeAgentOptions
+    except ImportError as e:
+        exit_missing_package(e)
+
+    client = AsyncClient(request=AsyncRequest(http2=True, limits=HTTP_LIMITS))
+
     try:
         # Login to Bluesky
         print("Connecting to Bluesky...")
-        client = Client()
-        client.login(bluesky_handle, bluesky_password)
+        await client.login(bluesky_handle, bluesky_password)
         user_did = client.me.did
         print(f"Logged in as: {bluesky_handle} ({user_did})")
         print()
 
         # Fetch labeler subscriptions
         print("Fetching labeler subscriptions...")
-        url = client._build_url('app.bsky.actor.getPreferences')
-        raw_response = client.request.get(url)
-        prefs_data = raw_response.content.get('preferences', [])
+        prefs_response = await client.app.bsky.actor.get_preferences()
 
         # Find labelersPref
         labelers_data = None
-        for pref in prefs_data:
-            if pref.get('$type') == 'app.bsky.actor.defs#labelersPref':
+        for pref in prefs_response.preferences:
+            if isinstance(pref, models.AppBskyActorDefs.LabelersPref):
                 labelers_data = pref
                 break
 
-        if not labelers_data or not labelers_data.get('labelers'):
+        if not labelers_data or not labelers_data.labelers:
             print("No labeler subscriptions found.")
             print("SILENT")
             return
 
-        labelers_list = labelers_data.get('labelers', [])
-        labeler_dids = [labeler['did'] for labeler in labelers_list]
+        labeler_dids = [labeler.did for labeler in labelers_data.labelers]
 
         print(f"Found {len(labeler_dids)} subscribed labeler(s)")
         print()
 
-        # Fetch labeler details
+        # Fetch labeler details and probe connectivity at the same time; the
+        # probes only need the subscribed DIDs, not the service views
         print("Fetching labeler details...")
-        labelers_response = client.app.bsky.labeler.get_services(params={'dids': labeler_dids})
+        details_task = asyncio.create_task(fetch_labeler_details(client, labeler_dids))
 
-        # Check connectivity for each labeler
         print("Checking AppView connectivity...")
+        profile_params = models.AppBskyActorGetProfiles.Params(actors=[user_did])
+        connectivity_task = asyncio.create_task(probe_labelers(client, labeler_dids, profile_params))
+
+        # Let both tasks finish before surfacing a failure, so neither is left
+        # running against the client when it is closed
+        results = await asyncio.gather(details_task, connectivity_task, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        labelers, connectivity_by_did = results
+
         print("-" * 70)
 
         labeler_info = []
         connectivity_issues = []
+        connected_count = 0
 
-        for view in labelers_response.views:
-            name = view.creator.display_name or view.creator.handle
-            handle = view.creator.handle
-            did = view.creator.did
-
-            # Check connectivity
-            connectivity = check_labeler_connectivity(client, did, user_did)
+        for did, details in labelers.items():
+            name = details['name']
+            handle = details['handle']
+            connectivity = connectivity_by_did[did]
 
             # Get indexed_at for reference
-            if hasattr(view, 'indexed_at') and view.indexed_at:
-                indexed_dt = parse_iso_datetime(view.indexed_at)
-                ago = time_ago(indexed_dt)
+            if details['indexed_at']:
+                indexed_dt = parse_iso_datetime(details['indexed_at'])
+                ago = time_ago(indexed_dt, now=now)
             else:
                 indexed_dt = None
                 ago = "Unknown"
@@ -259,7 +336,9 @@ async def main():
                 'service_updated': ago,
             })
 
-            if connectivity != 'connected':
+            if connectivity == 'connected':
+                connected_count += 1
+            else:
                 connectivity_issues.append({
                     'name': name,
                     'handle': handle,
@@ -268,28 +347,32 @@ async def main():
                 })
 
         print("-" * 70)
-        print(f"Connectivity check complete: {len([l for l in labeler_info if l['connectivity'] == 'connected'])}/{len(labeler_info)} connected")
+        print(f"Connectivity check complete: {connected_count}/{len(labeler_info)} connected")
         print()
 
         # Build context for Claude Agent research
-        context_report = "# Bluesky Labeler Connectivity Report\n\n"
-        context_report += f"**Total labelers checked:** {len(labeler_info)}\n"
-        context_report += f"**Date:** {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}\n\n"
+        parts = []
+        w = parts.append
+        w("# Bluesky Labeler Connectivity Report\n\n")
+        w(f"**Total labelers checked:** {len(labeler_info)}\n")
+        w(f"**Date:** {now.strftime('%Y-%m-%d %H:%M UTC')}\n\n")
 
         if connectivity_issues:
-            context_report += "## ⚠️ Connectivity Issues\n\n"
+            w("## ⚠️ Connectivity Issues\n\n")
             for labeler in connectivity_issues:
-                context_report += f"- **{labeler['name']}** (@{labeler['handle']})\n"
-                context_report += f"  - DID: `{labeler['did']}`\n"
-                context_report += f"  - Service updated: {labeler['service_updated']}\n"
-                context_report += f"  - Status: Offline/unreachable\n\n"
+                w(f"- **{labeler['name']}** (@{labeler['handle']})\n")
+                w(f"  - DID: `{labeler['did']}`\n")
+                w(f"  - Service updated: {labeler['service_updated']}\n")
+                w("  - Status: Offline/unreachable\n\n")
         else:
-            context_report += "## ✓ All Labelers Connected\n\n"
-            context_report += "All subscribed labelers are currently reachable by the AppView.\n\n"
+            w("## ✓ All Labelers Connected\n\n")
+            w("All subscribed labelers are currently reachable by the AppView.\n\n")
 
-        context_report += "## Subscribed Labelers\n\n"
+        w("## Subscribed Labelers\n\n")
         for labeler in labeler_info:
-            context_report += f"- **{labeler['name']}** (@{labeler['handle']})\n"
+            w(f"- **{labeler['name']}** (@{labeler['handle']})\n")
+
+        context_report = "".join(parts)
 
         # Prepare full research prompt
         full_prompt = get_research_prompt() + "\n\n" + context_report
@@ -322,6 +405,9 @@ Be thorough but efficient. Only report issues that warrant attention or review."
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 
+    finally:
+        await client.request.close()
+
 
 if __name__ == "__main__":
     try: